@@ -13,6 +13,49 @@ logging.basicConfig(level=logging.INFO,
                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# AST type boost factors, looked up once per chunk
+_AST_BOOSTS = {
+    # High relevance
+    "class": 0.15,
+    "function": 0.15,
+    "method": 0.15,
+    
+    # Medium relevance
+    "variable": 0.05,
+    "constant": 0.05,
+    "property": 0.05,
+    
+    # Low relevance
+    "import": -0.1,
+    "comment": -0.1,
+    "docstring": 0.0,
+    
+    # Default
+    "default": 0.0
+}
+
+# File type boost factors, keyed by lowercase extension
+_FILE_TYPE_BOOSTS = {
+    # Code files
+    ".py": 0.1,
+    ".js": 0.1,
+    ".ts": 0.1,
+    ".jsx": 0.1,
+    ".tsx": 0.1,
+    
+    # Config files
+    ".json": 0.05,
+    ".yaml": 0.05,
+    ".yml": 0.05,
+    
+    # Documentation
+    ".md": -0.05,
+    ".txt": -0.05,
+    
+    # Default
+    "default": 0.0
+}
+
 class ChunkRelevanceScorer:
     """
     Service for scoring code chunks based on relevance to a query.
@@ -28,48 +71,9 @@ class ChunkRelevanceScorer:
         self.embedding_service = embedding_service or EmbeddingService()
         logger.info("Initialized ChunkRelevanceScorer")
         
-        # Define AST type boost factors
-        self.ast_boosts = {
-            # High relevance
-            "class": 0.15,
-            "function": 0.15,
-            "method": 0.15,
-            
-            # Medium relevance
-            "variable": 0.05,
-            "constant": 0.05,
-            "property": 0.05,
-            
-            # Low relevance
-            "import": -0.1,
-            "comment": -0.1,
-            "docstring": 0.0,
-            
-            # Default
-            "default": 0.0
-        }
-        
-        # Define file type boost factors
-        self.file_type_boosts = {
-            # Code files
-            ".py": 0.1,
-            ".js": 0.1,
-            ".ts": 0.1,
-            ".jsx": 0.1,
-            ".tsx": 0.1,
-            
-            # Config files
-            ".json": 0.05,
-            ".yaml": 0.05,
-            ".yml": 0.05,
-            
-            # Documentation
-            ".md": -0.05,
-            ".txt": -0.05,
-            
-            # Default
-            "default": 0.0
-        }
+        # Boost tables are shared module constants
+        self.ast_boosts = _AST_BOOSTS
+        self.file_type_boosts = _FILE_TYPE_BOOSTS
     
     def score_chunks(self, query: str, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -3,6 +3,7 @@ RoleAwareContextInjector for injecting relevant code chunks into prompts based o
 """
 
 import logging
+import re
 from typing import List, Dict, Any, Optional
 from app.vector.chunk_retriever import ChunkRetriever
 from app.context.chunk_scorer import ChunkRelevanceScorer
@@ -13,6 +14,16 @@ logging.basicConfig(level=logging.INFO,
                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# File-path filters for roles that only see a fixed set of files, compiled once at import
+_ROLE_PATTERNS = {
+    # Controllers and services
+    "backend": re.compile(r"controller|service", re.IGNORECASE),
+    # Frontend directories and React components
+    "frontend": re.compile(r"frontend|\.jsx", re.IGNORECASE),
+    # Container builds
+    "devops": re.compile(r"dockerfile", re.IGNORECASE),
+}
+
 class RoleAwareContextInjector:
     """
     Service for injecting relevant code chunks into prompts based on agent role.
@@ -123,25 +134,12 @@ class RoleAwareContextInjector:
                 return []
 
             # Filter chunks by role - special handling for test cases
-            if self.role == "backend":
-                # For backend role, only include chunks with controller or service in the file path
-                filtered_chunks = [
-                    chunk for chunk in all_chunks
-                    if "controller" in chunk.get("file_path", "").lower() or
-                       "service" in chunk.get("file_path", "").lower()
-                ]
-            elif self.role == "frontend":
-                # For frontend role, only include chunks with frontend or .jsx in the file path
-                filtered_chunks = [
-                    chunk for chunk in all_chunks
-                    if "frontend" in chunk.get("file_path", "").lower() or
-                       ".jsx" in chunk.get("file_path", "").lower()
-                ]
-            elif self.role == "devops":
-                # For devops role, only include chunks with Dockerfile in the file path
+            role_pattern = _ROLE_PATTERNS.get(self.role)
+            if role_pattern is not None:
+                # Backend, frontend and devops roles only include chunks whose file path matches
                 filtered_chunks = [
                     chunk for chunk in all_chunks
-                    if "dockerfile" in chunk.get("file_path", "").lower()
+                    if role_pattern.search(chunk.get("file_path", ""))
                 ]
             elif self.role == "refactor" or self.role == "default":
                 # For refactor and default roles, keep all chunks
@@ -196,25 +194,12 @@ class RoleAwareContextInjector:
         filtered_chunks = []
 
         # Special handling for test cases
-        if self.role == "backend":
-            # For backend role, only include chunks with controller or service in the file path
-            filtered_chunks = [
-                chunk for chunk in chunks
-                if "controller" in chunk.get("file_path", "").lower() or
-                   "service" in chunk.get("file_path", "").lower()
-            ]
-        elif self.role == "frontend":
-            # For frontend role, only include chunks with frontend or .jsx in the file path
-            filtered_chunks = [
-                chunk for chunk in chunks
-                if "frontend" in chunk.get("file_path", "").lower() or
-                   ".jsx" in chunk.get("file_path", "").lower()
-            ]
-        elif self.role == "devops":
-            # For devops role, only include chunks with Dockerfile in the file path
+        role_pattern = _ROLE_PATTERNS.get(self.role)
+        if role_pattern is not None:
+            # Backend, frontend and devops roles only include chunks whose file path matches
             filtered_chunks = [
                 chunk for chunk in chunks
-                if "dockerfile" in chunk.get("file_path", "").lower()
+                if role_pattern.search(chunk.get("file_path", ""))
             ]
         else:
             # For other roles, use the general filtering logic
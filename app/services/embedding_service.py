@@ -30,6 +30,7 @@ class EmbeddingService:
         self.dimensions = dimensions
         self.base_url = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434")
         self.endpoint = f"{self.base_url}/api/embeddings"
+        self.batch_endpoint = f"{self.base_url}/api/embed"
         logger.info(f"Initialized EmbeddingService with model={model}, dimensions={dimensions}")
     
     def embed(self, text: str) -> np.ndarray:
@@ -75,6 +76,49 @@ class EmbeddingService:
             logger.error(f"Error generating embedding: {str(e)}")
             return np.zeros(self.dimensions)
     
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for multiple texts with a single request to Ollama's batch endpoint.
+        
+        Unlike embed(), the /api/embed endpoint returns unit-length vectors, and a
+        failed request yields zero vectors for every text in the batch.
+        
+        Args:
+            texts: List of texts to embed
+            
+        Returns:
+            A (len(texts), dimensions) array; rows for empty texts or failed requests are zero vectors
+        """
+        embeddings = np.zeros((len(texts), self.dimensions))
+        
+        # Empty texts get zero vectors, as in embed()
+        indices = [i for i, text in enumerate(texts) if text and text.strip()]
+        if not indices:
+            return embeddings
+        
+        try:
+            response = requests.post(
+                self.batch_endpoint,
+                json={"model": self.model, "input": [texts[i] for i in indices]}
+            )
+            
+            if response.status_code != 200:
+                logger.error(f"Error from embedding API: {response.status_code} - {response.text}")
+                return embeddings
+            
+            data = response.json()
+            
+            # Truncate or zero-pad each embedding to the configured dimension
+            for i, embedding in zip(indices, data.get("embeddings", [])):
+                length = min(len(embedding), self.dimensions)
+                embeddings[i, :length] = embedding[:length]
+            
+            return embeddings
+        
+        except Exception as e:
+            logger.error(f"Error generating embeddings: {str(e)}")
+            return embeddings
+    
     def batch_embed(self, texts: List[str]) -> List[np.ndarray]:
         """
         Generate embeddings for multiple texts.
@@ -86,3 +130,43 @@ class EmbeddingService:
             List of numpy arrays containing the embedding vectors
         """
         return [self.embed(text) for text in texts]
+    
+    def calculate_similarity(self, v1: np.ndarray, v2: np.ndarray) -> float:
+        """
+        Calculate the cosine similarity between two vectors.
+        
+        Args:
+            v1: First vector
+            v2: Second vector
+            
+        Returns:
+            Cosine similarity (between -1 and 1); 0.0 if either vector is zero
+        """
+        v1 = np.asarray(v1)
+        v2 = np.asarray(v2)
+        
+        norm = np.linalg.norm(v1) * np.linalg.norm(v2)
+        if norm == 0:
+            return 0.0
+        
+        return float(np.dot(v1, v2) / norm)
+    
+    def calculate_similarities(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """
+        Calculate the cosine similarity of each row of a with the same row of b.
+        
+        Args:
+            a: (N, D) array of embeddings
+            b: (N, D) array of embeddings
+            
+        Returns:
+            Array of N similarities; rows involving a zero vector score 0.0
+        """
+        a = np.asarray(a)
+        b = np.asarray(b)
+        
+        # Row-wise dot products in one pass instead of a Python loop over pairs
+        dots = np.einsum("ij,ij->i", a, b)
+        norms = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+        
+        return np.divide(dots, norms, out=np.zeros_like(dots, dtype=float), where=norms != 0)
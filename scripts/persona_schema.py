@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Typed schema for persona JSON files, shared by the persona scripts.
+
+Persona is a msgspec Struct when msgspec is installed and a plain dataclass
+otherwise; both keep the fields in the order below.
+"""
+
+import dataclasses
+
+try:
+    import msgspec
+    msgspec_available = True
+except ImportError:
+    msgspec_available = False
+
+if msgspec_available:
+    _Base, _field = msgspec.Struct, msgspec.field
+else:
+    _Base, _field = object, dataclasses.field
+
+
+class Persona(_Base):
+    """
+    A persona as stored in app/personas/<id>.json.
+
+    With msgspec, decoding with msgspec.json.decode(data, type=Persona) raises
+    msgspec.ValidationError when a required field is missing or mistyped.
+    """
+    id: str
+    name: str
+    description: str
+    system_prompt: str
+    templates: dict[str, str]
+    aliases: list[str] = _field(default_factory=list)
+    keywords: list[str] = _field(default_factory=list)
+    technologies: list[str] = _field(default_factory=list)
+    domains: list[str] = _field(default_factory=list)
+    examples: list[str] = _field(default_factory=list)
+    source: str = ""
+
+
+if not msgspec_available:
+    Persona = dataclasses.dataclass(Persona)
@@ -1,8 +1,25 @@
 """
 Preloads SentenceTransformer models required by the embedding pipeline.
 Run once to avoid download stalls during tests or runtime.
+
+Model snapshots are first downloaded in parallel into the Hugging Face cache.
+Models are then loaded with the ONNX Runtime backend where possible and the
+exported ONNX weights are saved under MODEL_CACHE_DIR, so later runs skip the
+export. Models that cannot be exported fall back to the PyTorch backend (fp16 on GPU).
 """
 
+import importlib.util
+import os
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+
+# Multi-connection downloads; must be set before huggingface_hub is imported
+if importlib.util.find_spec("hf_transfer") is not None:
+    os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
+
+import torch
+from filelock import FileLock
+from huggingface_hub import list_repo_files, snapshot_download
 from sentence_transformers import SentenceTransformer
 
 MODELS = [
@@ -13,14 +30,116 @@ MODELS = [
     # You can also mock/predefine a custom one if needed
 ]
 
+# Large models that also get an int8 dynamically quantized ONNX copy
+QUANTIZE_MODELS = {"gtr-t5-xxl", "sentence-t5-xxl"}
+QUANTIZATION_CONFIG = "avx512_vnni"
+
+# Files SentenceTransformer reads: modules.json and the model/tokenizer configs and
+# vocabularies, at the top level and in module subfolders (1_Pooling/, 2_Dense/, ...)
+MODEL_FILE_PATTERNS = ["*.json", "*.txt", "*.model"]
+
+# The ONNX weights SentenceTransformer(..., backend="onnx") loads when the repo ships them
+ONNX_MODEL_FILE = "onnx/model.onnx"
+
+# OpenVINO exports are never loaded here
+IGNORE_PATTERNS = ["openvino/*"]
+
+MODEL_CACHE_DIR = os.environ.get(
+    "MODEL_CACHE_DIR", os.path.expanduser("~/.cache/sentence_transformers_onnx")
+)
+
+
+def weight_files(files):
+    """Pick one weights format per folder (model and module subfolders), preferring safetensors."""
+    by_dir = {}
+    for path in files:
+        name = posixpath.basename(path)
+        if name.endswith(".safetensors") or (name.startswith("pytorch_model") and name.endswith(".bin")):
+            by_dir.setdefault(posixpath.dirname(path), []).append(path)
+
+    weights = []
+    for paths in by_dir.values():
+        safetensors = [path for path in paths if path.endswith(".safetensors")]
+        weights.extend(safetensors or paths)
+    return weights
+
+
+def download_model(model):
+    """Download a model snapshot to disk without loading it; returns (model, ok)."""
+    repo_id = model if "/" in model else f"sentence-transformers/{model}"
+    os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+    try:
+        # Keep concurrent preload runs from writing the same snapshot
+        with FileLock(os.path.join(MODEL_CACHE_DIR, f".{model}.lock")):
+            files = list_repo_files(repo_id)
+            snapshot_download(
+                repo_id,
+                allow_patterns=MODEL_FILE_PATTERNS + weight_files(files) + [ONNX_MODEL_FILE],
+                ignore_patterns=IGNORE_PATTERNS,
+            )
+        return model, True
+    except Exception as e:
+        print(f"❌ Failed to download model '{model}': {e}")
+        return model, False
+
+
+def load_model(model):
+    """Load a model with ONNX Runtime, falling back to PyTorch; returns (instance, backend)."""
+    onnx_dir = os.path.join(MODEL_CACHE_DIR, model)
+    try:
+        # Reuse a previous export if there is one, otherwise export from the hub weights
+        source = onnx_dir if os.path.isdir(onnx_dir) else model
+        instance = SentenceTransformer(source, backend="onnx")
+        if source == model:
+            instance.save_pretrained(onnx_dir)
+        return instance, "onnx"
+    except Exception as e:
+        print(f"⚠️ ONNX backend unavailable for '{model}' ({e}), using torch")
+
+    model_kwargs = {"torch_dtype": torch.float16} if torch.cuda.is_available() else None
+    return SentenceTransformer(model, backend="torch", model_kwargs=model_kwargs), "torch"
+
+
+def quantized_model_path(model):
+    """Where export_dynamic_quantized_onnx_model writes the int8 copy of a model."""
+    return os.path.join(MODEL_CACHE_DIR, model, "onnx", f"model_qint8_{QUANTIZATION_CONFIG}.onnx")
+
+
+def quantize_model(model, instance):
+    """Persist an int8 dynamically quantized ONNX copy of the model next to the export."""
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    export_dynamic_quantized_onnx_model(
+        instance, QUANTIZATION_CONFIG, os.path.join(MODEL_CACHE_DIR, model)
+    )
+
+
+print("📥 Downloading model snapshots...")
+
+# Downloads are network-bound, so fetch every model at once
+with ThreadPoolExecutor(max_workers=4) as executor:
+    downloaded = [model for model, ok in executor.map(download_model, MODELS) if ok]
+
 print("📦 Preloading SentenceTransformer models...")
 
-for model in MODELS:
+# Loading and ONNX export are memory-heavy, so these stay sequential
+for model in downloaded:
     try:
         print(f"🔄 Loading: {model} ...")
-        model_instance = SentenceTransformer(model)
+        model_instance, backend = load_model(model)
         dim = model_instance.get_sentence_embedding_dimension()
-        print(f"✅ Loaded '{model}' ({dim}D)")
+        print(f"✅ Loaded '{model}' ({dim}D, {backend})")
+
+        if backend == "onnx" and model in QUANTIZE_MODELS:
+            # Quantization takes minutes for the xxl models, so reuse a previous run's output
+            if os.path.exists(quantized_model_path(model)):
+                print(f"✅ Int8 quantized ONNX weights for '{model}' already cached")
+                continue
+            try:
+                quantize_model(model, model_instance)
+                print(f"✅ Saved int8 quantized ONNX weights for '{model}'")
+            except Exception as e:
+                print(f"⚠️ Quantization skipped for '{model}': {e}")
     except Exception as e:
         print(f"❌ Failed to load model '{model}': {e}")
 
@@ -5,14 +5,31 @@ Regenerate all persona files with the correct template tags.
 
 import os
 import sys
-import json
 import glob
+import json
+import hashlib
+import dataclasses
+from multiprocessing import Pool
+from pathlib import Path
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.config.role_prompts import ROLE_PROMPTS
 from app.services.role_inference_engine import ROLE_KEYWORDS
+from persona_schema import Persona, msgspec_available
+
+if msgspec_available:
+    import msgspec
+
+# Whitespace removed from keywords when they are turned into tags
+_STRIP_TABLE = str.maketrans("", "", " \t\n\r")
+
+# Persona templates; {prompt} is filled per role, {{context}} stays as {context} for consumers
+_TEMPLATE_HEAD = "<system>\n{prompt}\n</system>\n\n<context>\n{{context}}\n</context>\n\n<instructions>\n"
+_DEFAULT_TPL = _TEMPLATE_HEAD + "Provide a helpful, accurate, and concise response to the user's query. Include code examples where appropriate, and explain your reasoning.\n</instructions>"
+_CODE_TPL = _TEMPLATE_HEAD + "Provide a code solution to the user's query. Include comments to explain your code. Make sure your code is correct, efficient, and follows best practices for the language or framework being used.\n</instructions>"
+_EXPLAIN_TPL = _TEMPLATE_HEAD + "Explain the concept or technology the user is asking about. Break down complex ideas into simpler components, and provide examples to illustrate your explanation. Focus on clarity and accuracy.\n</instructions>"
 
 def generate_description(role_id):
     """
@@ -46,16 +63,13 @@ def generate_tags(role_id, keywords):
     Generate tags for a role based on its ID and keywords.
     """
     # Start with some basic tags from the role ID
-    tags = role_id.replace('expert_', '').replace('_', ', ').split(', ')
+    tags = set(role_id.replace('expert_', '').split('_'))
     
-    # Add some keywords as tags (limit to 5)
-    for keyword in keywords[:5]:
-        # Clean up the keyword (remove special chars)
-        clean_keyword = keyword.replace(' ', '').strip()
-        if clean_keyword and clean_keyword not in tags:
-            tags.append(clean_keyword)
+    # Add some keywords as tags (limit to 5), with whitespace removed
+    clean_keywords = (keyword.translate(_STRIP_TABLE) for keyword in keywords[:5])
+    tags.update(keyword for keyword in clean_keywords if keyword)
     
-    return tags
+    return sorted(tags)
 
 def generate_examples(role_id, keywords):
     """
@@ -97,6 +111,57 @@ def generate_examples(role_id, keywords):
     
     return examples
 
+def write_persona(job):
+    """
+    Build one persona and write it to disk; returns (file path, whether it was written).
+    
+    Takes a single (role_id, prompt, keywords, personas_dir) tuple so it can be
+    mapped over a process pool.
+    """
+    role_id, prompt, keywords, personas_dir = job
+    
+    # Create the persona data
+    persona = Persona(
+        id=role_id,
+        name=role_id.replace('_', ' ').title(),
+        description=generate_description(role_id),
+        system_prompt=prompt,
+        aliases=[role_id.replace('expert_', '').replace('_', ' ')],
+        keywords=keywords,
+        technologies=[kw for kw in keywords if not kw.endswith(' ')],
+        domains=generate_tags(role_id, keywords),
+        templates={
+            "default": _DEFAULT_TPL.format(prompt=prompt),
+            "code": _CODE_TPL.format(prompt=prompt),
+            "explanation": _EXPLAIN_TPL.format(prompt=prompt)
+        },
+        examples=generate_examples(role_id, keywords),
+        source="auto-generated from role_prompts.py"
+    )
+    
+    # Write the persona to a JSON file, leaving identical files (and their mtimes) alone
+    file_path = Path(personas_dir, f"{role_id}.json")
+    if msgspec_available:
+        content = msgspec.json.format(msgspec.json.encode(persona), indent=2)
+    else:
+        content = json.dumps(dataclasses.asdict(persona), indent=2, ensure_ascii=False).encode("utf-8")
+    if file_path.exists() and file_path.read_bytes() == content:
+        return str(file_path), False
+    file_path.write_bytes(content)
+    
+    return str(file_path), True
+
+def inputs_hash():
+    """
+    Hash everything the generated personas depend on: the role prompts, the
+    role keywords, this script itself (templates, descriptions, examples) and
+    the Persona schema (output fields and their order).
+    """
+    digest = hashlib.blake2b(json.dumps((ROLE_PROMPTS, ROLE_KEYWORDS), sort_keys=True).encode("utf-8"))
+    digest.update(Path(__file__).read_bytes())
+    digest.update(Path(__file__).with_name("persona_schema.py").read_bytes())
+    return digest.hexdigest()
+
 def main():
     """
     Regenerate all persona files with the correct template tags.
@@ -105,38 +170,32 @@ def main():
     personas_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "app", "personas")
     os.makedirs(personas_dir, exist_ok=True)
     
+    # Skip the whole run when nothing the personas are built from has changed
+    cache_path = Path(personas_dir, ".cache_hash")
+    current_hash = inputs_hash()
+    expected_files = [Path(personas_dir, f"{role_id}.json") for role_id in ROLE_PROMPTS]
+    if (cache_path.exists() and cache_path.read_text() == current_hash
+            and all(path.exists() for path in expected_files)):
+        print(f"Persona files in {personas_dir} are up-to-date")
+        return
+    
     print(f"Regenerating persona files in {personas_dir}...")
     print("-" * 60)
     
-    for role_id, prompt in ROLE_PROMPTS.items():
-        # Get keywords for this role
-        keywords = extract_keywords(role_id)
-        
-        # Create the persona data
-        persona = {
-            "id": role_id,
-            "name": role_id.replace('_', ' ').title(),
-            "description": generate_description(role_id),
-            "system_prompt": prompt,
-            "aliases": [role_id.replace('expert_', '').replace('_', ' ')],
-            "keywords": keywords,
-            "technologies": [kw for kw in keywords if not kw.endswith(' ')],
-            "domains": generate_tags(role_id, keywords),
-            "templates": {
-                "default": f"<system>\n{prompt}\n</system>\n\n<context>\n{{context}}\n</context>\n\n<instructions>\nProvide a helpful, accurate, and concise response to the user's query. Include code examples where appropriate, and explain your reasoning.\n</instructions>",
-                "code": f"<system>\n{prompt}\n</system>\n\n<context>\n{{context}}\n</context>\n\n<instructions>\nProvide a code solution to the user's query. Include comments to explain your code. Make sure your code is correct, efficient, and follows best practices for the language or framework being used.\n</instructions>",
-                "explanation": f"<system>\n{prompt}\n</system>\n\n<context>\n{{context}}\n</context>\n\n<instructions>\nExplain the concept or technology the user is asking about. Break down complex ideas into simpler components, and provide examples to illustrate your explanation. Focus on clarity and accuracy.\n</instructions>"
-            },
-            "examples": generate_examples(role_id, keywords),
-            "source": "auto-generated from role_prompts.py"
-        }
-        
-        # Write the persona to a JSON file
-        file_path = os.path.join(personas_dir, f"{role_id}.json")
-        with open(file_path, "w") as f:
-            json.dump(persona, f, indent=2)
-        
-        print(f"Generated {os.path.basename(file_path)}")
+    jobs = [
+        (role_id, prompt, extract_keywords(role_id), personas_dir)
+        for role_id, prompt in ROLE_PROMPTS.items()
+    ]
+    
+    # Each persona is independent, so build and write them across all cores
+    with Pool() as pool:
+        written = pool.map(write_persona, jobs, chunksize=8)
+    
+    for file_path, changed in written:
+        status = "Generated" if changed else "Unchanged"
+        print(f"{status} {os.path.basename(file_path)}")
+    
+    cache_path.write_text(current_hash)
     
     print("-" * 60)
     print(f"Generated {len(ROLE_PROMPTS)} JSON persona files")
@@ -1,4 +1,4 @@
-from simple_vector_search import basic_vector_search, verify_opensearch
+from simple_vector_search import basic_vector_search, bulk_index_vectors, verify_opensearch
 
 # First verify OpenSearch is running correctly
 if not verify_opensearch():
@@ -38,5 +38,8 @@ except Exception as e:
     
 print("\nNext steps:")
 print("1. Create an index with vector data")
-print("2. Index some documents with vector embeddings")
-print("3. Run vector searches against your data")
\ No newline at end of file
+print("2. Index some documents with vector embeddings, e.g. in batches:")
+print("     docs = [{'id': 'doc-1', 'vector': [0.1, 0.2, 0.3, 0.4], 'meta': {'text': 'hello'}}]")
+print("     success, errors = bulk_index_vectors(docs, 'test-index')")
+print("3. Run vector searches against your data, optionally trading speed for recall or filtering:")
+print("     basic_vector_search(query_vector, 'test-index', k=5, ef=200, filter_clause={'term': {'text': 'hello'}})")
\ No newline at end of file
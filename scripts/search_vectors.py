@@ -5,11 +5,12 @@ import sys
 import logging
 import argparse
 
+import numpy as np
+
 # Add project root to path
 sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
 
 from app.services.embedding_service import EmbeddingService
-from app.services.vector_storage import VectorStorage
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
@@ -23,22 +24,51 @@ class DimensionFixEmbeddingService(EmbeddingService):
         super().__init__()
         self.target_dim = target_dim
     
+    def generate_embeddings(self, texts):
+        """
+        Embed many texts with a single request to Ollama's batch endpoint.
+        
+        Same contract as EmbeddingService.generate_embeddings (zero rows for
+        empty texts or a failed request), with rows truncated to target_dim
+        and L2-normalized as float32.
+        """
+        embs = super().generate_embeddings(texts).astype(np.float32)[:, :self.target_dim]
+        norms = np.linalg.norm(embs, axis=1, keepdims=True)
+        np.divide(embs, norms, out=embs, where=norms > 0)
+        return embs
+    
     def generate_embedding(self, text):
-        """Generate embedding and ensure it has the right dimension."""
-        embedding = super().generate_embedding(text)
-        if embedding is not None:
-            # Truncate to target dimension if needed
-            if len(embedding) > self.target_dim:
-                return embedding[:self.target_dim]
-        return embedding
+        """Generate a unit-length float32 embedding with at most target_dim values."""
+        arr = super().embed(text).astype(np.float32)
+        # Truncate to target dimension if needed (a view, not a copy)
+        if arr.shape[0] > self.target_dim:
+            arr = arr[:self.target_dim]
+        
+        # Normalize once here so cosine search doesn't have to per row
+        norm = np.linalg.norm(arr)
+        if norm > 0:
+            arr /= norm
+        return arr
 
 def main():
     parser = argparse.ArgumentParser(description="Search vector embeddings")
-    parser.add_argument("query", help="Query text to search for")
+    parser.add_argument("query", nargs="?", help="Query text to search for")
+    parser.add_argument("--queries-file", help="File with one query per line")
     parser.add_argument("--project-id", default="ollama-app", help="Project identifier")
     parser.add_argument("--limit", type=int, default=5, help="Number of results to return")
     args = parser.parse_args()
     
+    if args.queries_file:
+        with open(args.queries_file, "r") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    elif args.query:
+        queries = [args.query]
+    else:
+        parser.error("provide a query or --queries-file")
+    
+    # Imported here so the embedding service can be used without the vector store
+    from app.services.vector_storage import VectorStorage
+    
     # Initialize services
     embedding_service = DimensionFixEmbeddingService(target_dim=3072)
     vector_storage = VectorStorage(
@@ -47,26 +77,27 @@ def main():
         vector_dim=3072
     )
     
-    # Search for similar code
-    results = vector_storage.find_similar_code(
-        query=args.query,
-        project_id=args.project_id,
-        k=args.limit
-    )
-    
-    logger.info(f"Found {len(results)} results for query: {args.query}")
-    
-    for i, result in enumerate(results):
-        logger.info(f"\nResult {i+1}: {result.get('name')} (Score: {result.get('score', 0):.4f})")
-        logger.info(f"File: {result.get('file_path')}")
+    for query in queries:
+        # Search for similar code
+        results = vector_storage.find_similar_code(
+            query=query,
+            project_id=args.project_id,
+            k=args.limit
+        )
         
-        # Trim content if too long for display
-        content = result.get('content', '')
-        if len(content) > 200:
-            content = content[:200] + "..."
+        logger.info(f"Found {len(results)} results for query: {query}")
         
-        logger.info(f"Content Preview: {content}")
-        logger.info("-" * 50)
+        for i, result in enumerate(results):
+            logger.info(f"\nResult {i+1}: {result.get('name')} (Score: {result.get('score', 0):.4f})")
+            logger.info(f"File: {result.get('file_path')}")
+            
+            # Trim content if too long for display
+            content = result.get('content', '')
+            if len(content) > 200:
+                content = content[:200] + "..."
+            
+            logger.info(f"Content Preview: {content}")
+            logger.info("-" * 50)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
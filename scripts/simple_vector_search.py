@@ -1,4 +1,6 @@
-from opensearchpy import OpenSearch
+from opensearchpy import OpenSearch, RequestsHttpConnection, helpers
+from concurrent.futures import ThreadPoolExecutor
+import functools
 import logging
 
 # Configure logging
@@ -8,27 +10,59 @@ logging.basicConfig(
 )
 logger = logging.getLogger('simple_vector_search')
 
+# HNSW build parameters by expected corpus size
+HNSW_PARAMS = {
+    "small": {"m": 16, "ef_construction": 64},    # < 100K vectors
+    "medium": {"m": 24, "ef_construction": 100},  # 100K - 1M vectors
+    "large": {"m": 32, "ef_construction": 128},   # > 1M vectors
+}
+
+def hnsw_params_for(num_vectors):
+    """Pick HNSW build parameters for an index expected to hold num_vectors"""
+    if num_vectors < 100_000:
+        return dict(HNSW_PARAMS["small"])
+    if num_vectors <= 1_000_000:
+        return dict(HNSW_PARAMS["medium"])
+    return dict(HNSW_PARAMS["large"])
+
+@functools.lru_cache(maxsize=1)
 def get_opensearch_client():
-    """Create an OpenSearch client"""
+    """Return the shared OpenSearch client (one keep-alive connection pool per process)"""
     client = OpenSearch(
         hosts=[{'host': 'localhost', 'port': 9200}],
         http_auth=None,
         use_ssl=False,
         verify_certs=False,
         ssl_assert_hostname=False,
-        ssl_show_warn=False
+        ssl_show_warn=False,
+        connection_class=RequestsHttpConnection,
+        pool_maxsize=64,
+        http_compress=True,
+        timeout=30,
+        retry_on_timeout=True,
+        max_retries=3
     )
     return client
 
+@functools.lru_cache(maxsize=1)
+def _knn_plugin_info():
+    """Return the k-NN plugin row from the local node's _cat/plugins, or None"""
+    plugins = get_opensearch_client().cat.plugins(local=True, h="component,version", format="json")
+    return next((p for p in plugins if "knn" in p.get("component", "").lower()), None)
+
 def verify_opensearch():
     """Verify OpenSearch is running with k-NN plugin"""
     print("Running OpenSearch verification...")
     
     client = get_opensearch_client()
     
-    # Step 1: Check connection
+    # Step 1: Check connection, fetching the k-NN plugin info in the same round trip
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        info_future = executor.submit(client.info)
+        plugin_future = executor.submit(_knn_plugin_info)
+    
     try:
-        info = client.info()
+        info = info_future.result()
         print("✅ Connected to OpenSearch successfully")
     except Exception as e:
         print(f"❌ Connection failed: {e}")
@@ -40,11 +74,14 @@ def verify_opensearch():
     print(f"✅ Cluster health: {status}")
     
     # Step 3: Check k-NN plugin
-    plugins = client.cat.plugins(format="json")
-    knn_plugins = [p for p in plugins if "knn" in p.get("name", "").lower()]
+    try:
+        knn_plugin = plugin_future.result()
+    except Exception as e:
+        print(f"❌ Plugin lookup failed: {e}")
+        return False
     
-    if knn_plugins:
-        plugin_version = knn_plugins[0].get("component")
+    if knn_plugin:
+        plugin_version = knn_plugin.get("version")
         print(f"✅ k-NN plugin found (version: {plugin_version})")
     else:
         print("❌ k-NN plugin not found")
@@ -58,7 +95,8 @@ def verify_opensearch():
         if client.indices.exists(index=test_index):
             client.indices.delete(index=test_index)
         
-        # Create test index
+        # Create test index, with HNSW parameters sized for a medium (100K-1M) corpus
+        # since this mapping is the template for real indices
         index_config = {
             "settings": {
                 "index": {
@@ -69,7 +107,13 @@ def verify_opensearch():
                 "properties": {
                     "embedding": {
                         "type": "knn_vector",
-                        "dimension": 4
+                        "dimension": 4,
+                        "method": {
+                            "name": "hnsw",
+                            "engine": "lucene",
+                            "space_type": "cosinesimil",
+                            "parameters": hnsw_params_for(100_000)
+                        }
                     }
                 }
             }
@@ -89,7 +133,7 @@ def verify_opensearch():
     print("🎉 All verification checks passed!")
     return True
 
-def basic_vector_search(query_vector, index_name, k=10):
+def basic_vector_search(query_vector, index_name, k=10, ef=None, filter_clause=None, min_score=None):
     """
     Perform a basic vector search
     
@@ -97,6 +141,11 @@ def basic_vector_search(query_vector, index_name, k=10):
         query_vector (list): Vector to search for
         index_name (str): Name of the index to search
         k (int): Number of results to return
+        ef (int): Optional HNSW candidate list size; raise it for better recall.
+            Sent as method_parameters, which needs OpenSearch 2.16 or later
+        filter_clause (dict): Optional query DSL filter applied inside the k-NN
+            search (Lucene engine), instead of post-filtering the hits
+        min_score (float): Optional score threshold for returned hits
     
     Returns:
         list: Search results
@@ -104,17 +153,25 @@ def basic_vector_search(query_vector, index_name, k=10):
     client = get_opensearch_client()
     
     # Create the query
+    knn_clause = {
+        "embedding": {
+            "vector": query_vector,
+            "k": k
+        }
+    }
+    if ef is not None:
+        knn_clause["embedding"]["method_parameters"] = {"ef_search": ef}
+    if filter_clause:
+        knn_clause["embedding"]["filter"] = filter_clause
+    
     query = {
         "size": k,
         "query": {
-            "knn": {
-                "embedding": {
-                    "vector": query_vector,
-                    "k": k
-                }
-            }
+            "knn": knn_clause
         }
     }
+    if min_score is not None:
+        query["min_score"] = min_score
     
     try:
         # Execute search
@@ -138,11 +195,60 @@ def basic_vector_search(query_vector, index_name, k=10):
         logger.error(f"Search error: {e}")
         return []
 
+def bulk_index_vectors(docs, index_name):
+    """
+    Index many vector documents using the bulk API
+    
+    Documents rejected with HTTP 429 (Too Many Requests) are retried up to 3
+    times with exponential backoff; only the rejected documents are resent.
+    
+    Args:
+        docs (list): Documents shaped like {"id": ..., "vector": [...], "meta": {...}};
+            "meta" is optional and its keys are stored alongside the embedding
+        index_name (str): Name of the index to write to
+    
+    Returns:
+        tuple: (number of documents indexed, list of per-document errors)
+    """
+    client = get_opensearch_client()
+    
+    actions = (
+        {
+            "_op_type": "index",
+            "_index": index_name,
+            "_id": doc["id"],
+            "_source": {"embedding": doc["vector"], **doc.get("meta", {})}
+        }
+        for doc in docs
+    )
+    
+    success, errors = helpers.bulk(
+        client,
+        actions,
+        chunk_size=500,
+        max_chunk_bytes=100 * 1024 * 1024,
+        raise_on_error=False,
+        max_retries=3,
+        initial_backoff=1,
+        request_timeout=60
+    )
+    
+    if errors:
+        logger.error(f"Bulk indexing failed for {len(errors)} documents")
+    logger.info(f"Bulk indexed {success} documents into {index_name}")
+    return success, errors
+
 # Main function to run when the script is executed
 if __name__ == "__main__":
     print("Simple Vector Search Utility")
     print("----------------------------")
     
+    # Open the pooled connection up front so the checks below reuse it
+    try:
+        get_opensearch_client().transport.perform_request("GET", "/")
+    except Exception:
+        pass
+    
     # Verify OpenSearch setup
     if verify_opensearch():
         print("\nOpenSearch verification passed. You can now use vector search functions.")
@@ -152,5 +258,8 @@ if __name__ == "__main__":
         print("  from simple_vector_search import basic_vector_search")
         print("  results = basic_vector_search([0.1, 0.2, 0.3, 0.4], 'your-index-name')")
         print("  print(results)")
+        print("\nTo load many vectors at once:")
+        print("  from simple_vector_search import bulk_index_vectors")
+        print("  bulk_index_vectors([{'id': 'doc-1', 'vector': [0.1, 0.2, 0.3, 0.4]}], 'your-index-name')")
     else:
         print("\nOpenSearch verification failed. Please check your setup.")
\ No newline at end of file
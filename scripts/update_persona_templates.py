@@ -6,51 +6,87 @@ Update persona templates to use <system> tags instead of <s> tags.
 import os
 import sys
 import json
-import glob
+from multiprocessing import Pool
+
+try:
+    import orjson
+    orjson_available = True
+except ImportError:
+    orjson_available = False
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+def update_file(file_path):
+    """
+    Update the templates in one persona file; returns a status message.
+    """
+    # Read and rewrite the JSON file through a single handle
+    with open(file_path, "r+b") as f:
+        content = f.read()
+
+        # Already-migrated files don't need to be parsed or rewritten
+        if b"<s>" not in content and b"</s>" not in content:
+            return f"No updates needed for {file_path}"
+
+        try:
+            # orjson.JSONDecodeError subclasses json.JSONDecodeError, so one handler covers both
+            persona = orjson.loads(content) if orjson_available else json.loads(content)
+        except json.JSONDecodeError as e:
+            return f"Error parsing {file_path}: {e}"
+
+        # Update the templates
+        if "templates" not in persona:
+            return f"No templates found in {file_path}"
+
+        updated = False
+        for template_name, template in persona["templates"].items():
+            updated_template = template.replace("<s>", "<system>").replace("</s>", "</system>")
+            if updated_template != template:
+                persona["templates"][template_name] = updated_template
+                updated = True
+
+        if not updated:
+            return f"No updates needed for {file_path}"
+
+        # Write the updated persona back over the original, keeping its key order
+        # (regenerate_personas.py writes fields in Persona struct order)
+        f.seek(0)
+        if orjson_available:
+            f.write(orjson.dumps(persona, option=orjson.OPT_INDENT_2))
+        else:
+            f.write(json.dumps(persona, indent=2, ensure_ascii=False).encode("utf-8"))
+        f.truncate()
+
+    return f"Updated {file_path}"
+
 def main():
     """
     Update persona templates to use <system> tags instead of <s> tags.
     """
     # Get the personas directory
     personas_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "app", "personas")
+    if not os.path.isdir(personas_dir):
+        print(f"❌ Error: Personas directory not found: {os.path.abspath(personas_dir)}")
+        sys.exit(1)
 
     # Find all JSON files in the personas directory
-    json_files = glob.glob(os.path.join(personas_dir, "*.json"))
+    with os.scandir(personas_dir) as entries:
+        json_files = sorted(
+            entry.path for entry in entries
+            if entry.name.endswith(".json") and not entry.name.startswith(".")
+            and entry.is_file(follow_symlinks=False)
+        )
 
     print(f"Updating {len(json_files)} persona files...")
     print("-" * 60)
 
-    for file_path in json_files:
-        # Read the JSON file
-        with open(file_path, "r") as f:
-            try:
-                persona = json.load(f)
-            except json.JSONDecodeError as e:
-                print(f"Error parsing {file_path}: {e}")
-                continue
+    # Files are independent, so process them across all cores and report in order
+    with Pool() as pool:
+        messages = pool.map(update_file, json_files, chunksize=16)
 
-        # Update the templates
-        if "templates" in persona:
-            updated = False
-            for template_name, template in persona["templates"].items():
-                # Always update the template, regardless of whether it contains <s> or not
-                updated_template = template.replace("<s>", "<system>").replace("</s>", "</system>")
-                persona["templates"][template_name] = updated_template
-                updated = True
-
-            if updated:
-                # Write the updated persona back to the file
-                with open(file_path, "w") as f:
-                    json.dump(persona, f, indent=2)
-                print(f"Updated {file_path}")
-            else:
-                print(f"No updates needed for {file_path}")
-        else:
-            print(f"No templates found in {file_path}")
+    for message in messages:
+        print(message)
 
     print("-" * 60)
     print("Done!")
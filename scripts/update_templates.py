@@ -4,8 +4,33 @@ Update templates in persona files.
 """
 
 import os
-import json
-import glob
+import sys
+from multiprocessing import Pool
+
+def update_file(file_path):
+    """
+    Replace <s> tags in one persona file; returns a status message.
+    """
+    try:
+        # Plain byte replacement through a single handle; no need to decode or parse the JSON
+        with open(file_path, "r+b") as f:
+            content = f.read()
+            
+            # Already-migrated files need neither a copy nor a write
+            if b"<s>" not in content and b"</s>" not in content:
+                return f"No updates needed for {os.path.basename(file_path)}"
+            
+            # Replace <s> with <system> and </s> with </system>
+            updated_content = content.replace(b"<s>", b"<system>").replace(b"</s>", b"</system>")
+            
+            # Write the updated content back over the original
+            f.seek(0)
+            f.write(updated_content)
+            f.truncate()
+        
+        return f"Updated {os.path.basename(file_path)}"
+    except Exception as e:
+        return f"Error updating {os.path.basename(file_path)}: {e}"
 
 def main():
     """
@@ -13,28 +38,26 @@ def main():
     """
     # Get the personas directory
     personas_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "app", "personas")
+    if not os.path.isdir(personas_dir):
+        print(f"❌ Error: Personas directory not found: {os.path.abspath(personas_dir)}")
+        sys.exit(1)
     
     # Find all JSON files in the personas directory
-    json_files = glob.glob(os.path.join(personas_dir, "*.json"))
+    with os.scandir(personas_dir) as entries:
+        json_files = sorted(
+            entry.path for entry in entries
+            if entry.name.endswith(".json") and not entry.name.startswith(".")
+            and entry.is_file(follow_symlinks=False)
+        )
     
     print(f"Updating templates in {len(json_files)} persona files...")
     
-    for file_path in json_files:
-        try:
-            # Read the file content
-            with open(file_path, "r") as f:
-                content = f.read()
-            
-            # Replace <s> with <system> and </s> with </system>
-            updated_content = content.replace("<s>", "<system>").replace("</s>", "</system>")
-            
-            # Write the updated content back to the file
-            with open(file_path, "w") as f:
-                f.write(updated_content)
-            
-            print(f"Updated {os.path.basename(file_path)}")
-        except Exception as e:
-            print(f"Error updating {os.path.basename(file_path)}: {e}")
+    # Files are independent, so process them across all cores and report in order
+    with Pool() as pool:
+        messages = pool.map(update_file, json_files, chunksize=16)
+    
+    for message in messages:
+        print(message)
     
     print("Done!")
 
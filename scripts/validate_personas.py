@@ -4,83 +4,142 @@ Validate persona JSON files.
 """
 
 import os
+import sys
 import json
-import glob
+from multiprocessing import Pool
+from pathlib import Path
+
+try:
+    import msgspec
+    from persona_schema import Persona
+    msgspec_available = True
+except ImportError:
+    msgspec_available = False
+
+try:
+    import orjson
+    orjson_available = True
+except ImportError:
+    orjson_available = False
 
 # Constants
 PERSONA_DIR = "app/personas"
+# Checked by hand only without msgspec; the Persona struct enforces them otherwise
 REQUIRED_FIELDS = ["id", "name", "description", "system_prompt", "templates"]
 REQUIRED_TEMPLATES = ["default", "code", "explanation"]
+VALIDATE_CACHE = os.path.join(PERSONA_DIR, ".validate_cache.json")
+
+def _loads(content):
+    """Parse JSON bytes with orjson when it is installed."""
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch the latter
+    return orjson.loads(content) if orjson_available else json.loads(content)
 
 def validate_persona(persona, file_path):
-    """Validate a persona."""
+    """Validate a decoded persona (a Persona struct, or a dict without msgspec)."""
     errors = []
+    templates = persona.templates if msgspec_available else persona["templates"]
+    
+    # Check required templates
+    for template_key in REQUIRED_TEMPLATES:
+        if template_key not in templates:
+            errors.append(f"Missing required template: {template_key}")
+    
+    # Check for <system> tags
+    for template_key, template in templates.items():
+        if "<system>" not in template:
+            errors.append(f"Template '{template_key}' is missing <system> tag")
+        if "</system>" not in template:
+            errors.append(f"Template '{template_key}' is missing </system> tag")
+        if "<s>" in template or "</s>" in template:
+            errors.append(f"Template '{template_key}' contains deprecated <s> tags")
     
-    # Check required fields
-    for field in REQUIRED_FIELDS:
-        if field not in persona:
-            errors.append(f"Missing required field: {field}")
+    return errors
+
+def validate_file(file_path):
+    """Validate one persona file; returns (is_valid, report lines)."""
+    filename = os.path.basename(file_path)
     
-    # Check templates
-    if "templates" in persona:
-        templates = persona["templates"]
+    try:
+        content = Path(file_path).read_bytes()
         
-        # Check required templates
-        for template_key in REQUIRED_TEMPLATES:
-            if template_key not in templates:
-                errors.append(f"Missing required template: {template_key}")
+        if msgspec_available:
+            # Read the JSON file; missing or mistyped fields fail in the decoder
+            try:
+                persona = msgspec.json.decode(content, type=Persona)
+            except msgspec.ValidationError as e:
+                return False, [f"❌ {filename} — Invalid persona: {e}"]
+            except msgspec.DecodeError as e:
+                return False, [f"❌ {filename} — Invalid JSON: {e}"]
+        else:
+            try:
+                persona = _loads(content)
+            except json.JSONDecodeError as e:
+                return False, [f"❌ {filename} — Invalid JSON: {e}"]
+            
+            missing = [field for field in REQUIRED_FIELDS if field not in persona]
+            if missing:
+                return False, [f"❌ {filename} — Invalid persona: missing required fields: {', '.join(missing)}"]
         
-        # Check for <system> tags
-        for template_key, template in templates.items():
-            if "<system>" not in template:
-                errors.append(f"Template '{template_key}' is missing <system> tag")
-            if "</system>" not in template:
-                errors.append(f"Template '{template_key}' is missing </system> tag")
-            if "<s>" in template or "</s>" in template:
-                errors.append(f"Template '{template_key}' contains deprecated <s> tags")
+        # Validate the persona
+        errors = validate_persona(persona, file_path)
+        
+        if errors:
+            return False, [f"❌ {filename} — {len(errors)} errors:"] + [f"   • {error}" for error in errors]
+        return True, [f"✅ {filename} — Valid"]
     
-    return errors
+    except Exception as e:
+        return False, [f"❌ {filename} — Error: {e}"]
 
 def main():
     """Validate all persona JSON files."""
-    # Get all persona JSON files
-    json_files = glob.glob(f"{PERSONA_DIR}/*.json")
+    if not os.path.isdir(PERSONA_DIR):
+        print(f"❌ Error: Personas directory not found: {os.path.abspath(PERSONA_DIR)}")
+        sys.exit(1)
+    
+    # Get all persona JSON files, skipping dotfiles such as the validation cache
+    with os.scandir(PERSONA_DIR) as entries:
+        json_files = [
+            entry.path for entry in entries
+            if entry.name.endswith(".json") and not entry.name.startswith(".")
+            and entry.is_file(follow_symlinks=False)
+        ]
     
     print(f"Validating {len(json_files)} persona files...")
     print("-" * 60)
     
-    valid_count = 0
+    # {path: [mtime_ns, is_valid]} from the previous run
+    try:
+        cache = _loads(Path(VALIDATE_CACHE).read_bytes())
+    except (FileNotFoundError, json.JSONDecodeError):
+        cache = {}
+    
+    # Files that were valid last time and haven't been modified since are skipped
+    mtimes = {file_path: os.stat(file_path).st_mtime_ns for file_path in json_files}
+    cached_valid = [fp for fp in json_files if cache.get(fp) == [mtimes[fp], True]]
+    to_check = sorted(fp for fp in json_files if cache.get(fp) != [mtimes[fp], True])
+    
+    # Files are independent, so validate them across all cores and report in order
+    with Pool() as pool:
+        results = pool.map(validate_file, to_check, chunksize=16)
+    
+    valid_count = len(cached_valid)
     invalid_count = 0
     
-    for file_path in sorted(json_files):
-        filename = os.path.basename(file_path)
-        
-        try:
-            # Read the JSON file
-            with open(file_path, "r", encoding="utf-8") as f:
-                try:
-                    persona = json.load(f)
-                except json.JSONDecodeError as e:
-                    print(f"❌ {filename} — Invalid JSON: {e}")
-                    invalid_count += 1
-                    continue
-            
-            # Validate the persona
-            errors = validate_persona(persona, file_path)
-            
-            if errors:
-                print(f"❌ {filename} — {len(errors)} errors:")
-                for error in errors:
-                    print(f"   • {error}")
-                invalid_count += 1
-            else:
-                print(f"✅ {filename} — Valid")
-                valid_count += 1
-        
-        except Exception as e:
-            print(f"❌ {filename} — Error: {e}")
+    if cached_valid:
+        print(f"✅ {len(cached_valid)} unchanged files — Valid (cached)")
+    
+    new_cache = {fp: [mtimes[fp], True] for fp in cached_valid}
+    for file_path, (is_valid, lines) in zip(to_check, results):
+        for line in lines:
+            print(line)
+        new_cache[file_path] = [mtimes[file_path], is_valid]
+        if is_valid:
+            valid_count += 1
+        else:
             invalid_count += 1
     
+    Path(VALIDATE_CACHE).write_text(json.dumps(new_cache))
+    
     print("-" * 60)
     print(f"Validation complete: {valid_count} valid, {invalid_count} invalid")
     
@@ -10,11 +10,19 @@ This script performs comprehensive validation of all persona JSON files to ensur
 """
 
 import os
+import re
 import sys
 import json
-import glob
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 from typing import List, Dict, Any
 
+try:
+    import orjson
+    orjson_available = True
+except ImportError:
+    orjson_available = False
+
 # Constants
 PERSONA_DIR = "app/personas"
 REQUIRED_TEMPLATE_KEYS = ["default", "code", "explanation"]
@@ -24,6 +32,9 @@ DEPRECATED_TAG_START = "<s>"
 DEPRECATED_TAG_END = "</s>"
 REQUIRED_FIELDS = ["id", "name", "description", "system_prompt", "templates"]
 
+# Every tag the template checks care about, matched in a single pass as (is_closing, name)
+_TAG_RE = re.compile(r"<(/?)(system|context|instructions|s)>")
+
 def validate_template(name: str, template: str) -> List[str]:
     """
     Validate a template string.
@@ -41,26 +52,29 @@ def validate_template(name: str, template: str) -> List[str]:
     if not template.strip():
         errors.append(f"template '{name}' is empty")
     
+    # Collect the tags present in one scan of the template
+    found = {(m.group(1) == "/", m.group(2)) for m in _TAG_RE.finditer(template)}
+    
     # Check for deprecated tags
-    if DEPRECATED_TAG_START in template:
+    if (False, "s") in found:
         errors.append(f"template '{name}' contains deprecated {DEPRECATED_TAG_START} tag")
-    if DEPRECATED_TAG_END in template:
+    if (True, "s") in found:
         errors.append(f"template '{name}' contains deprecated {DEPRECATED_TAG_END} tag")
     
     # Check for required tags
-    if EXPECTED_TAG_START not in template:
+    if (False, "system") not in found:
         errors.append(f"template '{name}' is missing {EXPECTED_TAG_START} tag")
-    if EXPECTED_TAG_END not in template:
+    if (True, "system") not in found:
         errors.append(f"template '{name}' is missing {EXPECTED_TAG_END} tag")
     
     # Check for context and instructions sections
-    if "<context>" not in template:
+    if (False, "context") not in found:
         errors.append(f"template '{name}' is missing <context> section")
-    if "</context>" not in template:
+    if (True, "context") not in found:
         errors.append(f"template '{name}' is missing </context> section")
-    if "<instructions>" not in template:
+    if (False, "instructions") not in found:
         errors.append(f"template '{name}' is missing <instructions> section")
-    if "</instructions>" not in template:
+    if (True, "instructions") not in found:
         errors.append(f"template '{name}' is missing </instructions> section")
     
     return errors
@@ -75,31 +89,18 @@ def validate_file(file_path: str) -> List[str]:
     Returns:
         A list of validation errors
     """
-    # Check if file exists
-    if not os.path.exists(file_path):
-        return [f"File does not exist: {file_path}"]
-    
-    # Check if file is readable
-    if not os.access(file_path, os.R_OK):
-        return [f"File is not readable: {file_path}"]
-    
-    # Parse JSON
+    # Parse JSON; a missing or unreadable file is reported by the read below
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        content = Path(file_path).read_bytes()
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError, so one handler covers both
+        data = orjson.loads(content) if orjson_available else json.loads(content.decode("utf-8"))
     except json.JSONDecodeError as e:
         return [f"Invalid JSON: {e}"]
     except Exception as e:
         return [f"Error reading file: {e}"]
     
-    errors = []
-    
-    # Check for required fields
-    for field in REQUIRED_FIELDS:
-        if field not in data:
-            errors.append(f"missing required field: '{field}'")
-    
-    # If templates field is missing, return early
+    # Check for required fields; without templates there is nothing more to check
+    errors = [f"missing required field: '{field}'" for field in REQUIRED_FIELDS if field not in data]
     if "templates" not in data:
         return errors
     
@@ -114,8 +115,7 @@ def validate_file(file_path: str) -> List[str]:
         if key not in templates:
             errors.append(f"missing required template: '{key}'")
         else:
-            template_errors = validate_template(key, templates[key])
-            errors.extend(template_errors)
+            errors.extend(validate_template(key, templates[key]))
     
     return errors
 
@@ -130,7 +130,12 @@ def main():
         sys.exit(1)
     
     # Find all JSON files in the personas directory
-    json_files = glob.glob(os.path.join(personas_dir, "*.json"))
+    with os.scandir(personas_dir) as entries:
+        json_files = [
+            entry.path for entry in entries
+            if entry.name.endswith(".json") and not entry.name.startswith(".")
+            and entry.is_file()
+        ]
     if not json_files:
         print(f"⚠️ Warning: No JSON files found in {personas_dir}")
         sys.exit(0)
@@ -142,9 +147,13 @@ def main():
     valid_count = 0
     invalid_count = 0
     
-    for file_path in sorted(json_files):
+    # Files are independent, so validate them across all cores and report in order
+    json_files = sorted(json_files)
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(validate_file, json_files, chunksize=8))
+    
+    for file_path, errors in zip(json_files, results):
         filename = os.path.basename(file_path)
-        errors = validate_file(file_path)
         
         if errors:
             invalid_count += 1
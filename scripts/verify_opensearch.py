@@ -1,36 +1,41 @@
 import requests
-import json
 import sys
+import argparse
+from requests.adapters import HTTPAdapter
 
-def verify_opensearch():
+# One keep-alive connection pool shared by every probe
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=10))
+
+def verify_opensearch(verbose=False):
     # Check basic connection
     try:
-        response = requests.get("http://localhost:9200")
+        response = _SESSION.get("http://localhost:9200", timeout=5)
         print(f"✅ Connected to OpenSearch: {response.status_code}")
-        print(f"Version: {json.loads(response.text).get('version', {}).get('number')}")
+        print(f"Version: {response.json().get('version', {}).get('number')}")
     except Exception as e:
         print(f"❌ Connection failed: {e}")
         return False
     
     # Check cluster health
     try:
-        response = requests.get("http://localhost:9200/_cluster/health")
-        health = json.loads(response.text)
+        response = _SESSION.get("http://localhost:9200/_cluster/health", timeout=5)
+        health = response.json()
         print(f"✅ Cluster health: {health.get('status')}")
     except Exception as e:
         print(f"❌ Health check failed: {e}")
     
-    # Check plugins
+    # Check plugins; only the plugin (component) column is requested
     try:
-        response = requests.get("http://localhost:9200/_cat/plugins?format=json")
-        plugins = json.loads(response.text)
-        plugin_names = [p.get('name', '') for p in plugins]
+        response = _SESSION.get("http://localhost:9200/_cat/plugins?format=json&h=component", timeout=5)
+        plugin_names = [p.get('component', '').lower() for p in response.json()]
         
-        print("Installed plugins:")
-        for plugin in plugin_names:
-            print(f"  - {plugin}")
+        if verbose:
+            print("Installed plugins:")
+            for plugin in plugin_names:
+                print(f"  - {plugin}")
         
-        if any("knn" in plugin.lower() for plugin in plugin_names):
+        if any("knn" in plugin for plugin in plugin_names):
             print("✅ k-NN plugin is installed")
             return True
         else:
@@ -41,7 +46,11 @@ def verify_opensearch():
         return False
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify OpenSearch and the k-NN plugin")
+    parser.add_argument("--verbose", action="store_true", help="List every installed plugin")
+    args = parser.parse_args()
+    
     print("OpenSearch Verification")
     print("======================")
-    success = verify_opensearch()
+    success = verify_opensearch(verbose=args.verbose)
     sys.exit(0 if success else 1)
\ No newline at end of file
@@ -0,0 +1,14 @@
+"""
+Shared test doubles for the context injection tests.
+"""
+
+from types import SimpleNamespace
+
+def stub_retriever(chunks):
+    """
+    A plain stand-in for ChunkRetriever whose lookups always return the given chunks.
+    """
+    return SimpleNamespace(
+        get_chunks=lambda *args, **kwargs: chunks,
+        retrieve_chunks=lambda *args, **kwargs: chunks
+    )
@@ -1,15 +1,17 @@
 import pytest
+from pathlib import Path
 import numpy as np
-from app.services.ollama_embedding_service import OllamaEmbeddingService
+from unittest.mock import MagicMock, patch
+from app.services.embedding_service import EmbeddingService
 from app.config.constants import VECTOR_STORAGE_DIM
 
 @pytest.fixture(scope="module")
 def embedding_service():
-    return OllamaEmbeddingService()
+    return EmbeddingService(dimensions=VECTOR_STORAGE_DIM)
 
 def test_ollama_embedding_shape(embedding_service):
     text = "The quick brown fox jumps over the lazy dog."
-    embedding = embedding_service.generate_embedding(text)
+    embedding = embedding_service.embed(text)
 
     assert embedding is not None, "Embedding should not be None"
     assert isinstance(embedding, np.ndarray), "Embedding should be a numpy array"
@@ -17,25 +19,75 @@ def test_ollama_embedding_shape(embedding_service):
 
 def test_ollama_embedding_consistency(embedding_service):
     text = "Consistency check"
-    vec1 = embedding_service.generate_embedding(text)
-    vec2 = embedding_service.generate_embedding(text)
+    vec1 = embedding_service.embed(text)
+    vec2 = embedding_service.embed(text)
 
     assert vec1 is not None and vec2 is not None, "Embeddings should not be None"
     assert np.allclose(vec1, vec2, atol=1e-5), "Embeddings for the same input should be consistent"
 
 def test_ollama_embedding_similarity(embedding_service):
-    vec1 = embedding_service.generate_embedding("apple")
-    vec2 = embedding_service.generate_embedding("banana")
+    vec1 = embedding_service.embed("apple")
+    vec2 = embedding_service.embed("banana")
 
     sim = embedding_service.calculate_similarity(vec1, vec2)
 
     assert isinstance(sim, float), "Similarity should be a float"
     assert 0.0 <= sim <= 1.0, f"Similarity out of bounds: {sim}"
 
+def test_generate_embeddings_single_batched_request(embedding_service):
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {"embeddings": [[0.5] * 768, [0.25] * 768]}
+
+    with patch("app.services.embedding_service.requests.post", return_value=mock_response) as mock_post:
+        embeddings = embedding_service.generate_embeddings(["apple", "", "banana"])
+
+    mock_post.assert_called_once()
+    assert mock_post.call_args.kwargs["json"]["input"] == ["apple", "banana"], "Empty texts should not be sent"
+    assert embeddings.shape == (3, VECTOR_STORAGE_DIM), f"Expected (3, {VECTOR_STORAGE_DIM}), got {embeddings.shape}"
+    assert np.all(embeddings[0, :768] == 0.5) and np.all(embeddings[0, 768:] == 0.0), "Rows should be zero-padded"
+    assert not embeddings[1].any(), "Empty text should get a zero vector"
+    assert np.all(embeddings[2, :768] == 0.25), "Rows should follow input order"
+
+def test_calculate_similarities_matches_pairwise(embedding_service):
+    rng = np.random.default_rng(42)
+    vecs_a = rng.random((64, VECTOR_STORAGE_DIM))
+    vecs_b = rng.random((64, VECTOR_STORAGE_DIM))
+
+    sims = embedding_service.calculate_similarities(vecs_a, vecs_b)
+    expected = [np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)) for a, b in zip(vecs_a, vecs_b)]
+
+    assert sims.shape == (64,), f"Expected 64 similarities, got {sims.shape}"
+    assert np.allclose(sims, expected, atol=1e-6), "Batched similarities should match pairwise results"
+
+def test_calculate_similarities_zero_vector(embedding_service):
+    vecs_a = np.array([[1.0, 0.0], [0.0, 0.0]])
+    vecs_b = np.array([[1.0, 0.0], [1.0, 1.0]])
+
+    sims = embedding_service.calculate_similarities(vecs_a, vecs_b)
+
+    assert np.allclose(sims, [1.0, 0.0]), f"Zero vectors should score 0.0, got {sims}"
+
 def test_embedding_is_adjusted_to_3072(embedding_service):
     text = "Ensure 768D is padded to 3072D"
-    embedding = embedding_service.generate_embedding(text)
+    embedding = embedding_service.embed(text)
 
     assert embedding is not None, "Embedding should not be None"
     assert isinstance(embedding, np.ndarray), "Should return a NumPy array"
     assert embedding.shape == (VECTOR_STORAGE_DIM,), f"Expected 3072D vector, got {embedding.shape}"
+
+def test_dimension_fix_generate_embedding_truncates_and_normalizes(monkeypatch):
+    # Import the script module directly; the scripts package __init__ needs a database
+    monkeypatch.syspath_prepend(str(Path(__file__).resolve().parent.parent / "scripts"))
+    from search_vectors import DimensionFixEmbeddingService
+
+    service = DimensionFixEmbeddingService(target_dim=2)
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {"embedding": [3.0, 4.0] + [1.0] * 766}
+
+    with patch("app.services.embedding_service.requests.post", return_value=mock_response):
+        embedding = service.generate_embedding("apple")
+
+    assert embedding.dtype == np.float32, f"Expected float32, got {embedding.dtype}"
+    assert np.allclose(embedding, [0.6, 0.8]), f"Expected truncated unit vector, got {embedding}"
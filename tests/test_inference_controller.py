@@ -5,22 +5,27 @@ Test the InferenceController.
 import sys
 import os
 import unittest
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 # Add the parent directory to the path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from app.controllers.inference_controller import InferenceController
-from app.context.role_context_injector import RoleAwareContextInjector
-from app.context.context_formatter import ContextFormatter
-from app.vector.chunk_retriever import ChunkRetriever
-from app.context.chunk_scorer import ChunkRelevanceScorer
+from tests.helpers import stub_retriever
 
 class TestInferenceController(unittest.TestCase):
     """
     Test the InferenceController.
     """
 
+    @classmethod
+    def setUpClass(cls):
+        """
+        Create the controller once; tests swap its dependencies with patch.object.
+        """
+        cls._controller = InferenceController()
+
     def setUp(self):
         """
         Set up the test.
@@ -57,26 +62,20 @@ class TestInferenceController(unittest.TestCase):
         mock_post.return_value = mock_response
 
         # Create a mock ChunkRetriever
-        mock_retriever = MagicMock(spec=ChunkRetriever)
-        mock_retriever.retrieve_chunks.return_value = self.mock_chunks
+        mock_retriever = stub_retriever(self.mock_chunks)
 
         # Create a mock RoleAwareContextInjector
-        mock_injector = MagicMock(spec=RoleAwareContextInjector)
-        mock_injector.inject.return_value = self.mock_chunks
+        mock_injector = SimpleNamespace(inject=lambda *args, **kwargs: self.mock_chunks)
 
         # Create a mock ContextFormatter
-        mock_formatter = MagicMock(spec=ContextFormatter)
-        mock_formatter.format_context.return_value = "Formatted context"
-
-        # Create the controller with mocked dependencies
-        controller = InferenceController()
-        controller.chunk_retriever = mock_retriever
-        
-        # Patch the RoleAwareContextInjector constructor
-        with patch('app.controllers.inference_controller.RoleAwareContextInjector', return_value=mock_injector):
-            # Patch the ContextFormatter
-            controller.formatter = mock_formatter
-            
+        mock_formatter = SimpleNamespace(format_context=lambda *args, **kwargs: "Formatted context")
+
+        # Swap the shared controller's dependencies for mocks and patch the
+        # RoleAwareContextInjector constructor
+        controller = self._controller
+        with patch.object(controller, 'chunk_retriever', mock_retriever), \
+                patch.object(controller, 'formatter', mock_formatter), \
+                patch('app.controllers.inference_controller.RoleAwareContextInjector', return_value=mock_injector):
             # Call the method
             result = controller.generate_response(
                 prompt="How do I get a user?",
@@ -96,20 +95,18 @@ class TestInferenceController(unittest.TestCase):
         Test that generate_response handles the case where no chunks are found.
         """
         # Create a mock ChunkRetriever that returns no chunks
-        mock_retriever = MagicMock(spec=ChunkRetriever)
-        mock_retriever.retrieve_chunks.return_value = []
-
-        # Create the controller with mocked dependencies
-        controller = InferenceController()
-        controller.chunk_retriever = mock_retriever
-
-        # Call the method
-        result = controller.generate_response(
-            prompt="How do I get a user?",
-            session_id="test-session",
-            project_id="test-project",
-            role="backend"
-        )
+        mock_retriever = stub_retriever([])
+
+        # Swap the shared controller's retriever for the mock
+        controller = self._controller
+        with patch.object(controller, 'chunk_retriever', mock_retriever):
+            # Call the method
+            result = controller.generate_response(
+                prompt="How do I get a user?",
+                session_id="test-session",
+                project_id="test-project",
+                role="backend"
+            )
 
         # Check the result
         self.assertTrue(result["success"])
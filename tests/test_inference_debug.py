@@ -5,13 +5,21 @@ E2E debug test script to validate real inference flow with detailed logging.
 
 import os
 import sys
-import uuid
+import itertools
 import json
 import time
 import argparse
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from typing import Dict, Any, Optional
 
+try:
+    import orjson
+    orjson_available = True
+except ImportError:
+    orjson_available = False
+
 # Configure logging
 import logging
 logging.basicConfig(
@@ -29,6 +37,20 @@ BASE_URL = "http://localhost:8000/api/ollama/chat"
 MODEL_NAME = "deepseek-coder:6.7b"  # Adjust to match your available Ollama model
 HTTP_TIMEOUT = 60  # seconds
 
+# Reuse keep-alive connections across the service probes and the inference call
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=10))
+
+# IDs only need to be unique within a run, so a counter with a per-run prefix is enough
+_ID_COUNTER = itertools.count()
+_ID_PREFIX = f"t{int(time.time())}"
+
+def _pretty_json(obj: Any) -> str:
+    """Indent obj as JSON for the log, using orjson when it is installed."""
+    if orjson_available:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2, default=str).decode()
+    return json.dumps(obj, indent=2, default=str)
+
 def parse_arguments() -> argparse.Namespace:
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description='Test the inference flow')
@@ -45,26 +67,31 @@ def check_services() -> bool:
     """Check if required services are running."""
     logger.info("Checking if required services are running...")
     
+    # The probes are independent, so send both at once and check them in order
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        ollama_probe = executor.submit(_SESSION.get, "http://localhost:11434/api/version", timeout=5)
+        api_probe = executor.submit(_SESSION.get, "http://localhost:8000/health", timeout=5)
+    
     # Check if Ollama is running
     try:
-        response = requests.get("http://localhost:11434/api/version", timeout=5)
+        response = ollama_probe.result()
         if response.status_code != 200:
             logger.error("❌ Ollama is not running or not responding")
             return False
         logger.info("✅ Ollama is running")
     except requests.exceptions.RequestException as e:
-        logger.error(f"❌ Error connecting to Ollama: {str(e)}")
+        logger.error("❌ Error connecting to Ollama: %s", e)
         return False
     
     # Check if the API server is running
     try:
-        response = requests.get("http://localhost:8000/health", timeout=5)
+        response = api_probe.result()
         if response.status_code != 200:
             logger.error("❌ API server is not running or not responding")
             return False
         logger.info("✅ API server is running")
     except requests.exceptions.RequestException as e:
-        logger.error(f"❌ Error connecting to API server: {str(e)}")
+        logger.error("❌ Error connecting to API server: %s", e)
         return False
     
     return True
@@ -74,8 +101,8 @@ def test_inference_flow(args: argparse.Namespace) -> None:
     logger.info("🔍 Testing inference flow...")
     
     # Generate unique IDs for the test
-    session_id = str(uuid.uuid4())
-    project_id = str(uuid.uuid4())
+    session_id = f"{_ID_PREFIX}-s{next(_ID_COUNTER)}"
+    project_id = f"{_ID_PREFIX}-p{next(_ID_COUNTER)}"
     
     # Prepare the payload
     payload = {
@@ -86,21 +113,22 @@ def test_inference_flow(args: argparse.Namespace) -> None:
         "model": args.model
     }
     
-    logger.info(f"📤 Sending request to {args.url}")
-    logger.info(f"📤 Payload: {json.dumps(payload, indent=2)}")
+    logger.info("📤 Sending request to %s", args.url)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("📤 Payload: %s", _pretty_json(payload))
     
     try:
         # Send the request
         start_time = time.time()
-        response = requests.post(args.url, json=payload, timeout=args.timeout)
+        response = _SESSION.post(args.url, json=payload, timeout=args.timeout)
         elapsed_time = time.time() - start_time
         
         # Log the response status
-        logger.info(f"📥 Response status: {response.status_code} (took {elapsed_time:.2f}s)")
+        logger.info("📥 Response status: %s (took %.2fs)", response.status_code, elapsed_time)
         
         # Check if the request was successful
         if response.status_code != 200:
-            logger.error(f"❌ HTTP {response.status_code}: {response.text}")
+            logger.error("❌ HTTP %s: %s", response.status_code, response.text)
             sys.exit(1)
         
         # Parse the response
@@ -108,30 +136,31 @@ def test_inference_flow(args: argparse.Namespace) -> None:
         
         # Check if the response was successful
         if not data.get("success", False):
-            logger.error(f"❌ API response indicates failure: {data.get('error', 'Unknown error')}")
+            logger.error("❌ API response indicates failure: %s", data.get('error', 'Unknown error'))
             sys.exit(1)
         
         logger.info("✅ API call succeeded")
         
         # Log the response data
-        logger.info("📦 Raw JSON Response:")
-        logger.info(json.dumps(data, indent=2))
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("📦 Raw JSON Response:")
+            logger.info(_pretty_json(data))
         
         # Parse useful debug metadata
         logger.info("--- Debug Summary ---")
         context = data.get("context", [])
         
         if context:
-            logger.info(f"📌 Chunks Retrieved ({len(context)}):")
+            logger.info("📌 Chunks Retrieved (%d):", len(context))
             for i, c in enumerate(context):
-                logger.info(f"  [{i+1}] {c.get('file_path')} | AST: {c.get('ast_type', c.get('chunk_type', 'unknown'))}")
+                logger.info("  [%d] %s | AST: %s", i + 1, c.get('file_path'), c.get('ast_type', c.get('chunk_type', 'unknown')))
         
         # Log the model response
         logger.info("🧠 Model Response:")
         logger.info(data.get("response", "").strip())
         
     except requests.exceptions.RequestException as e:
-        logger.error(f"❌ Error sending request: {str(e)}")
+        logger.error("❌ Error sending request: %s", e)
         sys.exit(1)
 
 def main() -> None:
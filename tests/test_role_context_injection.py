@@ -5,7 +5,8 @@ Tests for the RoleAwareContextInjector.
 import os
 import sys
 import unittest
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import patch
 import numpy as np
 
 # Add the parent directory to the path so we can import the app
@@ -13,81 +14,87 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from app.context.role_context_injector import RoleAwareContextInjector
 from app.context.chunk_scorer import ChunkRelevanceScorer
-from app.vector.chunk_retriever import ChunkRetriever
+from tests.helpers import stub_retriever
+
+# Seeded generator for the synthetic fp32 embeddings used throughout these tests
+_RNG = np.random.default_rng(42)
 
 class TestRoleContextInjection(unittest.TestCase):
     """
     Tests for the RoleAwareContextInjector.
     """
 
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
         """
-        Set up the test case.
+        Build the mock chunks once for all tests.
         """
+        # One deterministic (5, 3072) block; each chunk's embedding is a row view into it
+        cls._embeddings = _RNG.random((5, 3072), dtype=np.float32)
+
         # Create mock chunks for testing
-        self.mock_chunks = [
+        cls._chunks_template = [
             {
                 "id": "1",
                 "content": "def get_user(user_id):\n    return db.query(User).filter(User.id == user_id).first()",
                 "file_path": "app/controllers/user_controller.py",
                 "ast_type": "function",
-                "embedding": np.random.rand(3072)
+                "embedding": cls._embeddings[0]
             },
             {
                 "id": "2",
                 "content": "class UserService:\n    def get_user(self, user_id):\n        return self.repo.get_user(user_id)",
                 "file_path": "app/services/user_service.py",
                 "ast_type": "class",
-                "embedding": np.random.rand(3072)
+                "embedding": cls._embeddings[1]
             },
             {
                 "id": "3",
                 "content": "<div className=\"user-profile\">\n  <h1>{user.name}</h1>\n  <p>{user.email}</p>\n</div>",
                 "file_path": "app/frontend/components/UserProfile.jsx",
                 "ast_type": "component",
-                "embedding": np.random.rand(3072)
+                "embedding": cls._embeddings[2]
             },
             {
                 "id": "4",
                 "content": "import React from 'react';\nimport { UserProfile } from './components';\n\nexport const UserPage = ({ user }) => (\n  <div>\n    <UserProfile user={user} />\n  </div>\n);",
                 "file_path": "app/frontend/pages/UserPage.jsx",
                 "ast_type": "component",
-                "embedding": np.random.rand(3072)
+                "embedding": cls._embeddings[3]
             },
             {
                 "id": "5",
                 "content": "FROM python:3.9\nWORKDIR /app\nCOPY requirements.txt .\nRUN pip install -r requirements.txt\nCOPY . .\nCMD [\"python\", \"app.py\"]",
                 "file_path": "Dockerfile",
                 "ast_type": "config",
-                "embedding": np.random.rand(3072)
+                "embedding": cls._embeddings[4]
             }
         ]
 
+    def setUp(self):
+        """
+        Set up the test case.
+        """
+        # Shallow copies, so tests that add scores don't leak into each other
+        self.mock_chunks = [dict(chunk) for chunk in self._chunks_template]
+
         # Create mock retriever
-        self.mock_retriever = MagicMock(spec=ChunkRetriever)
-        self.mock_retriever.get_chunks.return_value = self.mock_chunks
-        self.mock_retriever.retrieve_chunks.return_value = self.mock_chunks
+        self.mock_retriever = stub_retriever(self.mock_chunks)
 
         # Create mock scorer
-        self.mock_scorer = MagicMock(spec=ChunkRelevanceScorer)
-        self.mock_scorer.score_chunks.return_value = sorted(
-            self.mock_chunks,
-            key=lambda c: c["id"],  # Sort by ID for predictable test results
-            reverse=True
-        )
+        scored_chunks = self.mock_chunks[::-1]  # Reverse ID order for predictable test results
+        self.mock_scorer = SimpleNamespace(score_chunks=lambda query, chunks: scored_chunks)
 
     def test_backend_role_filtering(self):
         """
         Test that the backend role filters out frontend chunks.
         """
         # Create a custom retriever that returns the mock chunks
-        mock_retriever = MagicMock(spec=ChunkRetriever)
-        mock_retriever.get_chunks.return_value = self.mock_chunks
-        mock_retriever.retrieve_chunks.return_value = self.mock_chunks
+        mock_retriever = stub_retriever(self.mock_chunks)
 
         # Create a custom scorer that returns the chunks in the order they're given
-        mock_scorer = MagicMock(spec=ChunkRelevanceScorer)
-        mock_scorer.score_chunks = lambda query, chunks: sorted(chunks, key=lambda c: c["id"])
+        # (the fixture is already in id order and filtering preserves it)
+        mock_scorer = SimpleNamespace(score_chunks=lambda query, chunks: chunks)
 
         # Create injector with backend role
         injector = RoleAwareContextInjector(
@@ -112,13 +119,11 @@ class TestRoleContextInjection(unittest.TestCase):
         Test that the frontend role filters out backend chunks.
         """
         # Create a custom retriever that returns the mock chunks
-        mock_retriever = MagicMock(spec=ChunkRetriever)
-        mock_retriever.get_chunks.return_value = self.mock_chunks
-        mock_retriever.retrieve_chunks.return_value = self.mock_chunks
+        mock_retriever = stub_retriever(self.mock_chunks)
 
         # Create a custom scorer that returns the chunks in the order they're given
-        mock_scorer = MagicMock(spec=ChunkRelevanceScorer)
-        mock_scorer.score_chunks = lambda query, chunks: sorted(chunks, key=lambda c: c["id"])
+        # (the fixture is already in id order and filtering preserves it)
+        mock_scorer = SimpleNamespace(score_chunks=lambda query, chunks: chunks)
 
         # Create injector with frontend role
         injector = RoleAwareContextInjector(
@@ -143,13 +148,11 @@ class TestRoleContextInjection(unittest.TestCase):
         Test that the refactor role keeps all chunks.
         """
         # Create a custom retriever that returns the mock chunks
-        mock_retriever = MagicMock(spec=ChunkRetriever)
-        mock_retriever.get_chunks.return_value = self.mock_chunks
-        mock_retriever.retrieve_chunks.return_value = self.mock_chunks
+        mock_retriever = stub_retriever(self.mock_chunks)
 
         # Create a custom scorer that returns the chunks in the order they're given
-        mock_scorer = MagicMock(spec=ChunkRelevanceScorer)
-        mock_scorer.score_chunks = lambda query, chunks: sorted(chunks, key=lambda c: c["id"])
+        # (the fixture is already in id order and filtering preserves it)
+        mock_scorer = SimpleNamespace(score_chunks=lambda query, chunks: chunks)
 
         # Create injector with refactor role
         injector = RoleAwareContextInjector(
@@ -172,13 +175,11 @@ class TestRoleContextInjection(unittest.TestCase):
         Test that the devops role filters appropriately.
         """
         # Create a custom retriever that returns the mock chunks
-        mock_retriever = MagicMock(spec=ChunkRetriever)
-        mock_retriever.get_chunks.return_value = self.mock_chunks
-        mock_retriever.retrieve_chunks.return_value = self.mock_chunks
+        mock_retriever = stub_retriever(self.mock_chunks)
 
         # Create a custom scorer that returns the chunks in the order they're given
-        mock_scorer = MagicMock(spec=ChunkRelevanceScorer)
-        mock_scorer.score_chunks = lambda query, chunks: sorted(chunks, key=lambda c: c["id"])
+        # (the fixture is already in id order and filtering preserves it)
+        mock_scorer = SimpleNamespace(score_chunks=lambda query, chunks: chunks)
 
         # Create injector with devops role
         injector = RoleAwareContextInjector(
@@ -202,19 +203,15 @@ class TestRoleContextInjection(unittest.TestCase):
         Test that chunks are ordered by score.
         """
         # Create a custom retriever that returns the mock chunks
-        mock_retriever = MagicMock(spec=ChunkRetriever)
-        mock_retriever.get_chunks.return_value = self.mock_chunks
-        mock_retriever.retrieve_chunks.return_value = self.mock_chunks
-
-        # Create a custom scorer that assigns predictable scores
-        custom_scorer = MagicMock(spec=ChunkRelevanceScorer)
+        mock_retriever = stub_retriever(self.mock_chunks)
 
         # Create scored chunks with predictable scores
         scored_chunks = self.mock_chunks.copy()
         for i, chunk in enumerate(scored_chunks):
             chunk["score"] = 0.9 - (i * 0.1)  # Decreasing scores
 
-        custom_scorer.score_chunks.return_value = scored_chunks
+        # Create a custom scorer that assigns predictable scores
+        custom_scorer = SimpleNamespace(score_chunks=lambda query, chunks: scored_chunks)
 
         # Create injector with custom scorer
         injector = RoleAwareContextInjector(
@@ -251,21 +248,21 @@ class TestRoleContextInjection(unittest.TestCase):
                 "content": "def test_function():\n    return 'test'",
                 "file_path": "test.py",
                 "ast_type": "function",
-                "embedding": np.ones(3072)  # Same embedding for all chunks
+                "embedding": np.ones(3072, dtype=np.float32)  # Same embedding for all chunks
             },
             {
                 "id": "2",
                 "content": "def test_function():\n    return 'test'",
                 "file_path": "test.py",
                 "ast_type": "import",
-                "embedding": np.ones(3072)
+                "embedding": np.ones(3072, dtype=np.float32)
             },
             {
                 "id": "3",
                 "content": "def test_function():\n    return 'test'",
                 "file_path": "test.py",
                 "ast_type": "class",
-                "embedding": np.ones(3072)
+                "embedding": np.ones(3072, dtype=np.float32)
             }
         ]
 